@@ -1,979 +1,1621 @@
-import pandas as pd
-import numpy as np
-from pathlib import Path
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-import sys
-import os
-from copy import copy
-from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Font
-from openpyxl.utils.dataframe import dataframe_to_rows
-
-class MSDataProcessor:
-    """Mass Spectrometry Data Processor"""
-    
-    def __init__(self, mz_tolerance_ppm=20, rt_tolerance=1):
-        """
-        Initialize processor
-        
-        Parameters:
-        -----------
-        mz_tolerance_ppm : float
-            m/z tolerance (ppm)
-        rt_tolerance : float
-            RT tolerance
-        """
-        self.mz_tolerance = mz_tolerance_ppm / 1_000_000
-        self.rt_tolerance = rt_tolerance
-        
-    def load_data(self, file_path):
-        """
-        Load data and automatically identify columns (supports Excel, CSV, TSV)
-        
-        Parameters:
-        -----------
-        file_path : str
-            File path
-            
-        Returns:
-        --------
-        pd.DataFrame
-            DataFrame with all columns
-        """
-        file_path = str(file_path)
-        self.source_excel_path = None
-        self.source_sheet_name = None
-
-        # Read file based on extension
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, keep_default_na=False)
-        elif file_path.endswith('.tsv') or file_path.endswith('.txt'):
-            df = pd.read_csv(file_path, sep='\t', keep_default_na=False)
-        elif file_path.endswith(('.xlsx', '.xls')):
-            # 記錄原始檔案路徑，供輸出時複製工作表使用
-            self.source_excel_path = file_path
-            wb_temp = load_workbook(file_path, data_only=False)
-            self.source_sheet_name = wb_temp.sheetnames[0]
-            ws_temp = wb_temp[self.source_sheet_name]
-
-            # 偵測 column A 中帶有紅色字型 (rgb 類型) 的資料列
-            red_font_pandas_indices = set()
-            for row_idx in range(2, ws_temp.max_row + 1):
-                cell = ws_temp.cell(row=row_idx, column=1)
-                font = cell.font
-                if font and font.color and font.color.type == 'rgb':
-                    rgb_str = str(font.color.rgb)
-                    if 'FF0000' in rgb_str.upper():
-                        # pandas DataFrame index = Excel row - 2
-                        red_font_pandas_indices.add(row_idx - 2)
-
-            wb_temp.close()
-            df = pd.read_excel(file_path, keep_default_na=False)
-            # 直接在 DataFrame 中標記紅色列，讓標記跟著資料一起過濾
-            df["__is_red_font"] = df.index.isin(red_font_pandas_indices)
-        else:
-            raise ValueError(f"Unsupported file format. Supported: .xlsx, .xls, .csv, .tsv, .txt")
-        
-        # 自動識別欄位（只要包含關鍵詞即可，大小寫不敏感）
-        combined_mz_rt_col = self._find_combined_mz_rt_column(df.columns)
-        rt_col = self._find_column(df.columns, ['rt', 'retention'])
-        mz_col = self._find_column(df.columns, ['m/z', 'mz', 'mass'])
-        intensity_cols = self._find_columns(df.columns, ['peak area'])
-        if not intensity_cols:
-            intensity_cols = self._find_columns(df.columns, ['area', 'intensity', 'abundance', 'height'])
-        id_col = self._find_column(df.columns, ['id'])
-
-        # If header does not indicate combined m/z/RT, infer from first column values.
-        if not combined_mz_rt_col:
-            combined_mz_rt_col = self._infer_combined_mz_rt_column(df)
-
-        # If no intensity columns matched by keywords, default to all columns after m/z/RT.
-        _internal_cols = {"__is_red_font"}
-        if not intensity_cols and combined_mz_rt_col:
-            intensity_cols = [c for c in self._columns_after(df.columns, combined_mz_rt_col) if c not in _internal_cols]
-        elif not intensity_cols and rt_col and mz_col:
-            exclude = {rt_col, mz_col} | _internal_cols
-            if id_col:
-                exclude.add(id_col)
-            intensity_cols = [col for col in df.columns if col not in exclude]
-        
-        # 判斷資料來源（僅供顯示）
-        has_mzmine = any('mzmine' in str(col).lower() for col in df.columns)
-        self.data_source = "MZmine" if has_mzmine else "FeatureHunter"
-        
-        self.temp_mz_rt_cols = []
-
-        self.temp_mz_rt_cols = []
-
-        if combined_mz_rt_col:
-            mz_col = "mz"
-            rt_col = "rt"
-            if mz_col in df.columns:
-                mz_col = "__mz"
-            if rt_col in df.columns:
-                rt_col = "__rt"
-            parts = df[combined_mz_rt_col].astype(str).str.split("/", n=1, expand=True)
-            if parts.shape[1] < 2:
-                raise ValueError("Combined m/z/RT column detected but values are not in 'mz/RT' format.")
-            df[mz_col] = pd.to_numeric(parts[0].str.strip(), errors="coerce").round(4)
-            df[rt_col] = pd.to_numeric(parts[1].str.strip(), errors="coerce").round(4)
-            # Mark derived columns for removal before output.
-            self.temp_mz_rt_cols = [mz_col, rt_col]
-        elif rt_col and mz_col:
-            # Keep original values for output; parse numerics only when needed.
-            pass
-        
-        if rt_col and mz_col and intensity_cols:
-            self.rt_col = rt_col
-            self.mz_col = mz_col
-            self.intensity_cols = intensity_cols
-            self.intensity_col = intensity_cols[0]
-            columns_list = list(df.columns)
-            self.intensity_col_positions = [
-                i for i, col in enumerate(columns_list) if col in self.intensity_cols
-            ]
-            
-            # ??? ID ???????? MZmine??????
-            if id_col and has_mzmine:
-                mz_num = self._numeric_series(df[self.mz_col]).round(4)
-                rt_num = self._numeric_series(df[self.rt_col]).round(4)
-                mask = (
-                    df[id_col].notna() & 
-                    (df[id_col].astype(str).str.strip().str.upper() != 'NA') &
-                    rt_num.notna() & 
-                    mz_num.notna()
-                )
-                if intensity_cols:
-                    intensity_num = self._numeric_intensity_df(df)
-                    mask &= intensity_num.notna().any(axis=1)
-                df = df[mask]
-        else:
-            available_cols = "\nAvailable columns: " + ", ".join(df.columns.tolist())
-            raise ValueError(f"Cannot identify required columns.\nPlease check your file headers.{available_cols}")
-        
-        self.all_columns = list(df.columns)
-        
-        # Remove invalid data (m/z > 0 and any intensity > 0)
-        mz_num = self._numeric_series(df[self.mz_col]).round(4)
-        rt_num = self._numeric_series(df[self.rt_col]).round(4)
-        intensity_num = self._numeric_intensity_df(df)
-        intensity_positive = (intensity_num > 0).any(axis=1)
-        valid_mask = (mz_num > 0) & intensity_positive & rt_num.notna() & mz_num.notna()
-        df = df[valid_mask]
-        
-        return df.reset_index(drop=True)
-    
-    def _find_column(self, columns, keywords):
-        """
-        Find matching column name - 只要欄位名包含任一關鍵詞即可（大小寫不敏感）
-        
-        Parameters:
-        -----------
-        columns : list
-            All column names
-        keywords : list
-            Keywords where at least ONE must be present in the column name
-            
-        Returns:
-        --------
-        str or None
-            Found column name
-        """
-        for col in columns:
-            col_lower = str(col).lower().strip()
-            if any(kw.lower() in col_lower for kw in keywords):
-                return col
-        return None
-
-    def _find_columns(self, columns, keywords):
-        """Find all matching column names by keyword list."""
-        matches = []
-        for col in columns:
-            col_lower = str(col).lower().strip()
-            if any(kw.lower() in col_lower for kw in keywords):
-                matches.append(col)
-        return matches
-
-    def _find_combined_mz_rt_column(self, columns):
-        """Find a combined m/z/RT column, e.g., 'mz/RT'."""
-        for col in columns:
-            col_lower = str(col).lower().strip().replace(" ", "")
-            if "mz" in col_lower and "rt" in col_lower and "/" in col_lower:
-                return col
-        return None
-
-    def _infer_combined_mz_rt_column(self, df):
-        """Infer combined m/z/RT column from first column values."""
-        if df is None or df.empty:
-            return None
-        first_col = df.columns[0]
-        series = df[first_col].astype(str)
-        sample = series[series.notna()].head(50)
-        if sample.empty:
-            return None
-        parts = sample.str.split("/", n=1, expand=True)
-        if parts.shape[1] < 2:
-            return None
-        left = pd.to_numeric(parts[0].str.strip(), errors="coerce")
-        right = pd.to_numeric(parts[1].str.strip(), errors="coerce")
-        valid_ratio = ((left.notna()) & (right.notna())).mean()
-        if valid_ratio >= 0.6:
-            return first_col
-        return None
-
-    def _columns_after(self, columns, col):
-        """Return columns after the specified column in original order."""
-        columns_list = list(columns)
-        if col not in columns_list:
-            return []
-        idx = columns_list.index(col)
-        return columns_list[idx + 1:]
-
-    def _drop_temp_columns(self, df):
-        """Remove derived columns from combined m/z/RT."""
-        temp_cols = getattr(self, "temp_mz_rt_cols", [])
-        if not temp_cols:
-            return df
-        cols_to_drop = [col for col in temp_cols if col in df.columns]
-        if not cols_to_drop:
-            return df
-        return df.drop(columns=cols_to_drop)
-
-    def _normalize_output_columns(self, df):
-        """Restore blank headers where pandas created 'Unnamed: x'."""
-        rename_map = {}
-        for col in df.columns:
-            if isinstance(col, str) and col.startswith("Unnamed: "):
-                rename_map[col] = ""
-        if not rename_map:
-            return df
-        return df.rename(columns=rename_map)
-
-    def _numeric_series(self, series):
-        return pd.to_numeric(series, errors="coerce")
-
-    def _numeric_intensity_df(self, df):
-        return df[self.intensity_cols].apply(pd.to_numeric, errors="coerce")
-
-    def _compute_occurrence_and_sum(self, df):
-        intensities = self._numeric_intensity_df(df).to_numpy(dtype=float)
-        occurrence = (intensities > 0).sum(axis=1).astype(int)
-        total_intensity = np.nansum(intensities, axis=1)
-        return occurrence, total_intensity
-    
-    def find_unique_signals(self, df):
-        """
-        Find unique signals (remove duplicates), keep all other columns
-        ????????????????????O(n?) ?????
-        
-        Parameters:
-        -----------
-        df : pd.DataFrame
-            Original data
-            
-        Returns:
-        --------
-        pd.DataFrame
-            De-duplicated data
-        """
-        if len(df) == 0:
-            return df
-
-        rt_values = self._numeric_series(df[self.rt_col]).to_numpy(dtype=float)
-        mz_values = self._numeric_series(df[self.mz_col]).to_numpy(dtype=float)
-        occurrence, total_intensity = self._compute_occurrence_and_sum(df)
-
-        order = np.argsort(rt_values)
-        rt_sorted = rt_values[order]
-        mz_sorted = mz_values[order]
-        occ_sorted = occurrence[order]
-        sum_sorted = total_intensity[order]
-
-        keep_mask = np.ones(len(df), dtype=bool)
-        n = len(df)
-
-        for i in range(n):
-            if not keep_mask[i]:
-                continue
-
-            rt_i = rt_sorted[i]
-            mz_i = mz_sorted[i]
-            occ_i = occ_sorted[i]
-            sum_i = sum_sorted[i]
-
-            j = i + 1
-            while j < n and (rt_sorted[j] - rt_i) <= self.rt_tolerance:
-                if not keep_mask[j]:
-                    j += 1
-                    continue
-
-                mz_j = mz_sorted[j]
-                reference_mz = mz_j if mz_j > mz_i else mz_i
-                if reference_mz > 0:
-                    mz_diff_ratio = abs(mz_j - mz_i) / reference_mz
-                    if mz_diff_ratio <= self.mz_tolerance:
-                        occ_j = occ_sorted[j]
-                        sum_j = sum_sorted[j]
-                        if (occ_j > occ_i) or (occ_j == occ_i and sum_j > sum_i):
-                            keep_mask[i] = False
-                            break
-                        else:
-                            keep_mask[j] = False
-                j += 1
-
-        kept_indices = order[keep_mask]
-        return df.iloc[kept_indices].reset_index(drop=True)
-    
-    def process(self, file_path, top_n=None):
-        """
-        Complete processing workflow
-        
-        Parameters:
-        -----------
-        file_path : str
-            Input file path
-        top_n : int, optional
-            Output top N signals, None means output all
-            
-        Returns:
-        --------
-        tuple
-            (processed DataFrame, statistics dictionary)
-        """
-        # Load data
-        df_original = self.load_data(file_path)
-        original_count = len(df_original)
-
-        # 分離紅色標記列（不參與去重複，直接保留）
-        has_red_col = "__is_red_font" in df_original.columns
-        if has_red_col and df_original["__is_red_font"].any():
-            red_mask = df_original["__is_red_font"]
-            df_red = df_original[red_mask].copy()
-            df_normal = df_original[~red_mask].drop(columns=["__is_red_font"]).reset_index(drop=True)
-        else:
-            df_red = pd.DataFrame()
-            df_normal = df_original.drop(columns=["__is_red_font"], errors="ignore")
-
-        # Remove duplicates（僅對非紅色列進行）
-        df_unique = self.find_unique_signals(df_normal)
-        unique_count = len(df_unique)
-
-        # Sort by intensity (sum across samples if multiple)
-        intensity_num = self._numeric_intensity_df(df_unique).fillna(0)
-        if len(self.intensity_cols) == 1:
-            df_sorted = df_unique.assign(
-                _intensity_sort=intensity_num[self.intensity_cols[0]]
-            ).sort_values("_intensity_sort", ascending=False).drop(
-                columns=["_intensity_sort"]
-            ).reset_index(drop=True)
-        else:
-            total_intensity = intensity_num.sum(axis=1)
-            df_sorted = (
-                df_unique.assign(_total_intensity=total_intensity)
-                .sort_values("_total_intensity", ascending=False)
-                .drop(columns=["_total_intensity"])
-                .reset_index(drop=True)
-            )
-
-        # Take top N（僅對非紅色列計數）
-        if top_n and top_n > 0:
-            df_result = df_sorted.head(top_n)
-        else:
-            df_result = df_sorted
-
-        # 合併：紅色標記列（置頂） + 去重複結果
-        if not df_red.empty:
-            df_red = df_red.copy()
-            df_red["__is_red_font"] = True
-        df_result = df_result.copy()
-        df_result["__is_red_font"] = False
-        df_result = pd.concat([df_red, df_result], ignore_index=True)
-
-        # Remove derived m/z/RT columns before output
-        df_result = self._drop_temp_columns(df_result)
-        df_result = self._normalize_output_columns(df_result)
-        
-        # Statistics
-        red_count = len(df_red)
-        stats = {
-            'original_count': original_count,
-            'unique_count': unique_count,
-            'output_count': len(df_result),
-            'red_preserved_count': red_count,
-            'data_source': self.data_source,
-            'sample_count': len(self.intensity_cols)
-        }
-        
-        return df_result, stats
-    
-    def save_results(self, df, output_path):
-        """
-        Save results (supports Excel, CSV, TSV)
-        
-        Parameters:
-        -----------
-        df : pd.DataFrame
-            Data to save
-        output_path : str
-            Output file path
-        """
-        output_path = str(output_path)
-
-        # 取出紅色標記資訊，然後移除暫存欄位
-        red_font_flags = []
-        if "__is_red_font" in df.columns:
-            red_font_flags = df["__is_red_font"].tolist()
-            df = df.drop(columns=["__is_red_font"])
-
-        if output_path.endswith('.csv'):
-            df.to_csv(output_path, index=False)
-        elif output_path.endswith('.tsv') or output_path.endswith('.txt'):
-            df.to_csv(output_path, sep='\t', index=False)
-        elif output_path.endswith(('.xlsx', '.xls')):
-            source_path = getattr(self, "source_excel_path", None)
-            sheet_name = getattr(self, "source_sheet_name", None)
-
-            if source_path and sheet_name:
-                # 完整複製原始 Excel 檔（保留所有工作表、字型、格式）
-                wb = load_workbook(source_path)
-                ws = wb[sheet_name]
-
-                # 清除該工作表原有資料
-                ws.delete_rows(1, ws.max_row)
-
-                # 寫入處理後的資料（標題 + 內容）
-                for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-                    for c_idx, value in enumerate(row, 1):
-                        cell = ws.cell(row=r_idx, column=c_idx, value=value)
-
-                # 對 intensity 欄位套用科學記號格式
-                col_positions = getattr(self, "intensity_col_positions", [])
-                if col_positions:
-                    for intensity_col_idx in col_positions:
-                        col_excel_idx = intensity_col_idx + 1
-                        for row in range(2, len(df) + 2):
-                            cell = ws.cell(row=row, column=col_excel_idx)
-                            cell.number_format = '0.00E+00'
-                else:
-                    for intensity_col in self.intensity_cols:
-                        if intensity_col not in df.columns:
-                            continue
-                        intensity_col_idx = list(df.columns).index(intensity_col) + 1
-                        for row in range(2, len(df) + 2):
-                            cell = ws.cell(row=row, column=intensity_col_idx)
-                            cell.number_format = '0.00E+00'
-
-                # 對紅色標記列的 column A 套用紅色字型
-                if red_font_flags:
-                    red_font_style = Font(color="FF0000")
-                    for i, is_red in enumerate(red_font_flags):
-                        if is_red:
-                            # DataFrame row i → Excel row i+2 (row 1 = header)
-                            cell = ws.cell(row=i + 2, column=1)
-                            cell.font = red_font_style
-
-                wb.save(output_path)
-                wb.close()
-            else:
-                # 非 Excel 來源或缺少資訊，退回原有邏輯
-                with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='Sheet1', index=False)
-                    workbook = writer.book
-                    worksheet = writer.sheets['Sheet1']
-                    col_positions = getattr(self, "intensity_col_positions", [])
-                    if col_positions:
-                        for intensity_col_idx in col_positions:
-                            col_excel_idx = intensity_col_idx + 1
-                            for row in range(2, len(df) + 2):
-                                cell = worksheet.cell(row=row, column=col_excel_idx)
-                                cell.number_format = '0.00E+00'
-                    else:
-                        for intensity_col in self.intensity_cols:
-                            if intensity_col not in df.columns:
-                                continue
-                            intensity_col_idx = list(df.columns).index(intensity_col) + 1
-                            for row in range(2, len(df) + 2):
-                                cell = worksheet.cell(row=row, column=intensity_col_idx)
-                                cell.number_format = '0.00E+00'
-        else:
-            raise ValueError(f"Unsupported output format. Supported: .xlsx, .xls, .csv, .tsv, .txt")
-
-
-class MSProcessorGUI:
-    """Graphical User Interface with flat design"""
-    
-    # Color scheme - high contrast flat design
-    COLORS = {
-        'bg': '#F5F5F5',           # Light gray background
-        'card': '#FFFFFF',          # White cards
-        'primary': '#2196F3',       # Blue primary
-        'primary_dark': '#1976D2',  # Darker blue
-        'success': '#4CAF50',       # Green
-        'success_dark': '#388E3C',  # Darker green
-        'text': '#212121',          # Dark text
-        'text_secondary': '#757575', # Gray text
-        'border': '#E0E0E0',        # Light border
-        'shadow': '#00000010'       # Subtle shadow
-    }
-    
-    def __init__(self, root):
-        self.root = root
-        self.root.title("MS Data Deduplication Tool")
-        self.root.geometry("700x550")
-        
-        # Detect platform and apply appropriate styling
-        self.is_macos = sys.platform == 'darwin'
-        
-        if self.is_macos:
-            # macOS specific configuration
-            try:
-                # Use ttk.Style for better macOS compatibility
-                self.style = ttk.Style()
-                self.style.theme_use('aqua')
-            except:
-                pass
-        
-        self.root.configure(bg=self.COLORS['bg'])
-        
-        # Make window non-resizable for consistent layout
-        self.root.resizable(False, False)
-        
-        self.processor = None
-        self.input_file = None
-        self.param_entries = []  # Initialize before create_widgets
-        
-        # Get the directory where the executable is located
-        if getattr(sys, 'frozen', False):
-            # Running as compiled executable
-            if self.is_macos:
-                # For macOS .app bundle, get the directory containing the .app
-                # sys.executable points to: YourApp.app/Contents/MacOS/YourApp
-                # We want the directory containing YourApp.app
-                executable_path = Path(sys.executable)
-                # Go up: MacOS -> Contents -> YourApp.app -> parent directory
-                app_bundle = executable_path.parent.parent.parent
-                self.base_dir = app_bundle.parent
-            else:
-                # For Windows executable
-                self.base_dir = Path(sys.executable).parent
-        else:
-            # Running as script
-            self.base_dir = Path(__file__).parent
-        
-        # Create output directory with error handling
-        try:
-            self.output_dir = self.base_dir / "output_Replicates_eliminating_tool"
-            self.output_dir.mkdir(exist_ok=True)
-            # Test write permission
-            test_file = self.output_dir / ".write_test"
-            test_file.touch()
-            test_file.unlink()
-        except (PermissionError, OSError) as e:
-            # If we can't write to the app directory, use user's Documents folder
-            if self.is_macos:
-                home = Path.home()
-                self.output_dir = home / "Documents" / "output_Replicates_eliminating_tool"
-            else:
-                # Windows fallback to Documents
-                home = Path.home()
-                self.output_dir = home / "Documents" / "output_Replicates_eliminating_tool"
-
-            try:
-                self.output_dir.mkdir(parents=True, exist_ok=True)
-            except Exception as mkdir_error:
-                # Last resort: use temporary directory
-                import tempfile
-                self.output_dir = Path(tempfile.gettempdir()) / "output_Replicates_eliminating_tool"
-                self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.create_widgets()
-    
-    def create_card(self, parent, **kwargs):
-        """Create a card-style frame"""
-        frame = tk.Frame(
-            parent,
-            bg=self.COLORS['card'],
-            highlightbackground=self.COLORS['border'],
-            highlightthickness=1,
-            **kwargs
-        )
-        return frame
-    
-    def _create_button(self, parent, text, command, color_key='primary', **kwargs):
-        """Create a styled button with platform-specific handling"""
-        if self.is_macos:
-            # Use ttk.Button for macOS with custom styling
-            button = ttk.Button(
-                parent,
-                text=text,
-                command=command,
-                **kwargs
-            )
-            # Apply hover effect using bind
-            def on_enter(e):
-                # macOS ttk buttons handle their own hover states
-                pass
-            def on_leave(e):
-                pass
-            button.bind("<Enter>", on_enter)
-            button.bind("<Leave>", on_leave)
-        else:
-            # Use tk.Button with full styling for Windows/Linux
-            button = tk.Button(
-                parent,
-                text=text,
-                command=command,
-                bg=self.COLORS[color_key],
-                fg="white",
-                font=("Segoe UI", kwargs.get('font_size', 10), "bold"),
-                relief="flat",
-                cursor="hand2",
-                **{k: v for k, v in kwargs.items() if k not in ['font_size']}
-            )
-            dark_color = color_key + '_dark'
-            if dark_color in self.COLORS:
-                button.bind("<Enter>", lambda e: button.config(bg=self.COLORS[dark_color]))
-                button.bind("<Leave>", lambda e: button.config(bg=self.COLORS[color_key]))
-        
-        return button
-    
-    def create_widgets(self):
-        # Main container with padding
-        main_container = tk.Frame(self.root, bg=self.COLORS['bg'])
-        main_container.pack(fill="both", expand=True, padx=20, pady=20)
-        
-        # Title section
-        title_frame = tk.Frame(main_container, bg=self.COLORS['bg'])
-        title_frame.pack(fill="x", pady=(0, 20))
-        
-        title_font = ("SF Pro Display", 24, "bold") if self.is_macos else ("Segoe UI", 24, "bold")
-        subtitle_font = ("SF Pro Text", 10) if self.is_macos else ("Segoe UI", 10)
-        
-        title_label = tk.Label(
-            title_frame,
-            text="MS Data Deduplication Tool",
-            font=title_font,
-            bg=self.COLORS['bg'],
-            fg=self.COLORS['text']
-        )
-        title_label.pack()
-        
-        subtitle_label = tk.Label(
-            title_frame,
-            text="Remove duplicate signals and export top results",
-            font=subtitle_font,
-            bg=self.COLORS['bg'],
-            fg=self.COLORS['text_secondary']
-        )
-        subtitle_label.pack()
-        
-        # File selection card
-        file_card = self.create_card(main_container)
-        file_card.pack(fill="x", pady=(0, 15))
-        
-        file_inner = tk.Frame(file_card, bg=self.COLORS['card'])
-        file_inner.pack(fill="x", padx=20, pady=15)
-        
-        tk.Label(
-            file_inner,
-            text="1. Select Input File",
-            font=("Segoe UI", 11, "bold"),
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text']
-        ).pack(anchor="w", pady=(0, 10))
-        
-        file_row = tk.Frame(file_inner, bg=self.COLORS['card'])
-        file_row.pack(fill="x")
-        
-        label_font = ("SF Pro Text", 9) if self.is_macos else ("Segoe UI", 9)
-        
-        self.file_label = tk.Label(
-            file_row,
-            text="No file selected",
-            font=label_font,
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text_secondary'],
-            anchor="w"
-        )
-        self.file_label.pack(side="left", fill="x", expand=True)
-        
-        # Create browse button
-        if self.is_macos:
-            select_btn = ttk.Button(
-                file_row,
-                text="Browse Files",
-                command=self.select_file
-            )
-        else:
-            select_btn = tk.Button(
-                file_row,
-                text="Browse Files",
-                command=self.select_file,
-                bg=self.COLORS['primary'],
-                fg="white",
-                font=("Segoe UI", 10, "bold"),
-                relief="flat",
-                cursor="hand2",
-                padx=20,
-                pady=8
-            )
-            select_btn.bind("<Enter>", lambda e: select_btn.config(bg=self.COLORS['primary_dark']))
-            select_btn.bind("<Leave>", lambda e: select_btn.config(bg=self.COLORS['primary']))
-        
-        select_btn.pack(side="right")
-        
-        # Parameters card
-        param_card = self.create_card(main_container)
-        param_card.pack(fill="x", pady=(0, 15))
-        
-        param_inner = tk.Frame(param_card, bg=self.COLORS['card'])
-        param_inner.pack(fill="x", padx=20, pady=15)
-        
-        tk.Label(
-            param_inner,
-            text="2. Configure Parameters",
-            font=("Segoe UI", 11, "bold"),
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text']
-        ).pack(anchor="w", pady=(0, 15))
-        
-        # Parameter grid
-        param_grid = tk.Frame(param_inner, bg=self.COLORS['card'])
-        param_grid.pack(fill="x")
-        
-        # m/z tolerance
-        self.mz_tolerance_var = self._create_param_row(param_grid, "m/z Tolerance (ppm):", "20", 
-                               "Acceptable mass difference")
-        
-        # RT tolerance
-        self.rt_tolerance_var = self._create_param_row(param_grid, "RT Tolerance:", "1", 
-                               "Acceptable retention time difference")
-        
-        # Top N
-        self.top_n_var = self._create_param_row(param_grid, "Output Top N Signals:", "10", 
-                               "Enter 0 for all signals")
-        
-        # Process button
-        if self.is_macos:
-            process_btn = ttk.Button(
-                main_container,
-                text="Start Processing",
-                command=self.process_data
-            )
-        else:
-            process_btn = tk.Button(
-                main_container,
-                text="Start Processing",
-                command=self.process_data,
-                bg=self.COLORS['success'],
-                fg="white",
-                font=("Segoe UI", 12, "bold"),
-                relief="flat",
-                cursor="hand2",
-                padx=30,
-                pady=15
-            )
-            process_btn.bind("<Enter>", lambda e: process_btn.config(bg=self.COLORS['success_dark']))
-            process_btn.bind("<Leave>", lambda e: process_btn.config(bg=self.COLORS['success']))
-        
-        process_btn.pack(pady=(0, 15))
-        
-        # Status card
-        status_card = self.create_card(main_container)
-        status_card.pack(fill="both", expand=True)
-        
-        status_inner = tk.Frame(status_card, bg=self.COLORS['card'])
-        status_inner.pack(fill="both", expand=True, padx=20, pady=15)
-        
-        tk.Label(
-            status_inner,
-            text="Processing Status",
-            font=("Segoe UI", 11, "bold"),
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text']
-        ).pack(anchor="w", pady=(0, 10))
-        
-        text_font = ("Menlo", 9) if self.is_macos else ("Consolas", 9)
-        
-        self.status_text = tk.Text(
-            status_inner,
-            height=8,
-            font=text_font,
-            bg="#FAFAFA",
-            fg=self.COLORS['text'],
-            relief="flat",
-            borderwidth=0,
-            state="disabled"
-        )
-        self.status_text.pack(fill="both", expand=True)
-    
-    def _create_param_row(self, parent, label_text, default_value, hint_text):
-        """Create a parameter input row"""
-        row_frame = tk.Frame(parent, bg=self.COLORS['card'])
-        row_frame.pack(fill="x", pady=8)
-        
-        param_font = ("SF Pro Text", 10, "bold") if self.is_macos else ("Segoe UI", 10, "bold")
-        hint_font = ("SF Pro Text", 9) if self.is_macos else ("Segoe UI", 9)
-        entry_font = ("SF Pro Text", 10) if self.is_macos else ("Segoe UI", 10)
-        
-        # Left side: Label
-        tk.Label(
-            row_frame,
-            text=label_text,
-            font=param_font,
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text'],
-            anchor="w",
-            width=20
-        ).pack(side="left")
-        
-        # Middle: Entry
-        entry_var = tk.StringVar(value=default_value)
-        entry = tk.Entry(
-            row_frame,
-            textvariable=entry_var,
-            font=entry_font,
-            bg="white",
-            fg=self.COLORS['text'],
-            relief="solid",
-            borderwidth=1,
-            width=12
-        )
-        entry.pack(side="left", padx=(0, 15))
-        
-        # Right side: Hint text
-        tk.Label(
-            row_frame,
-            text=hint_text,
-            font=hint_font,
-            bg=self.COLORS['card'],
-            fg=self.COLORS['text_secondary'],
-            anchor="w"
-        ).pack(side="left", fill="x", expand=True)
-        
-        return entry_var  # Return the StringVar directly
-    
-    def select_file(self):
-        """Select input file"""
-        file_path = filedialog.askopenfilename(
-            title="Select Data File",
-            filetypes=[
-                ("All Supported Formats", "*.xlsx *.xls *.csv *.tsv *.txt"),
-                ("Excel files", "*.xlsx *.xls"),
-                ("CSV files", "*.csv"),
-                ("TSV files", "*.tsv *.txt"),
-                ("All files", "*.*")
-            ]
-        )
-        
-        if file_path:
-            self.input_file = file_path
-            self.file_label.config(
-                text=Path(file_path).name,
-                fg=self.COLORS['text']
-            )
-    
-    def update_status(self, message):
-        """Update status display"""
-        self.status_text.config(state="normal")
-        self.status_text.insert("end", message + "\n")
-        self.status_text.see("end")
-        self.status_text.config(state="disabled")
-        self.root.update()
-    
-    def process_data(self):
-        """Process data"""
-        if not self.input_file:
-            messagebox.showerror("Error", "Please select an input file first!")
-            return
-        
-        try:
-            # Clear status
-            self.status_text.config(state="normal")
-            self.status_text.delete(1.0, "end")
-            self.status_text.config(state="disabled")
-            
-            # Read parameters
-            mz_tol = float(self.mz_tolerance_var.get())
-            rt_tol = float(self.rt_tolerance_var.get())
-            top_n = int(self.top_n_var.get())
-            if top_n == 0:
-                top_n = None
-            
-            self.update_status("Starting processing...")
-            self.update_status(f"Output directory: {self.output_dir}")
-            
-            # Create processor
-            processor = MSDataProcessor(mz_tolerance_ppm=mz_tol, rt_tolerance=rt_tol)
-            
-            # Process data
-            self.update_status("Loading data...")
-            df_result, stats = processor.process(self.input_file, top_n)
-            
-            # Display identified columns
-            self.update_status(f"\nData Source: {stats['data_source']}")
-            self.update_status(f"Identified Columns:")
-            self.update_status(f"  RT: {processor.rt_col}")
-            self.update_status(f"  m/z: {processor.mz_col}")
-            self.update_status(f"  Intensity columns ({len(processor.intensity_cols)}): {', '.join(processor.intensity_cols)}")
-            self.update_status(f"Samples detected: {stats['sample_count']}")
-            other_cols = len(processor.all_columns) - len(processor.intensity_cols) - 2
-            self.update_status(f"Other columns preserved: {max(other_cols, 0)}")
-            
-            # Generate output filename with timestamp
-            input_path = Path(self.input_file)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"processed_{input_path.stem}_{timestamp}{input_path.suffix}"
-            output_path = self.output_dir / output_filename
-            
-            # Ensure output directory exists and is writable
-            try:
-                self.output_dir.mkdir(parents=True, exist_ok=True)
-            except Exception as mkdir_error:
-                self.update_status(f"\nWarning: Could not create output directory: {mkdir_error}")
-                # Fallback to Desktop
-                desktop = Path.home() / "Desktop" / "MS_Data_Output"
-                desktop.mkdir(parents=True, exist_ok=True)
-                output_path = desktop / output_filename
-                self.update_status(f"Using alternative location: {desktop}")
-            
-            # Save results
-            self.update_status("\nSaving results...")
-            processor.save_results(df_result, str(output_path))
-            
-            # Display statistics
-            self.update_status("\n" + "="*50)
-            self.update_status("Processing Complete!")
-            self.update_status(f"Original data: {stats['original_count']} signals")
-            if stats.get('red_preserved_count', 0) > 0:
-                self.update_status(f"Red-font preserved (no dedup): {stats['red_preserved_count']} signals")
-            self.update_status(f"After deduplication: {stats['unique_count']} signals")
-            self.update_status(f"Output count: {stats['output_count']} signals")
-            self.update_status(f"\nResults saved to:\n{output_path}")
-            
-            # Show file in Finder/Explorer
-            if self.is_macos:
-                import subprocess
-                subprocess.run(["open", "-R", str(output_path)])
-            
-            messagebox.showinfo("Success", f"Processing complete!\n\nResults saved to:\n{output_path}")
-            
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            messagebox.showerror("Error", f"An error occurred during processing:\n{str(e)}")
-            self.update_status(f"\nError: {str(e)}")
-            self.update_status(f"\nDetails:\n{error_details}")
-
-
-def main():
-    """Main program"""
-    root = tk.Tk()
-    app = MSProcessorGUI(root)
-    root.mainloop()
-
-
-if __name__ == "__main__":
-    main()
+import math
+import re
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+import sys
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from datetime import datetime
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+# Numba 為選用依賴：有裝就 JIT 編譯去重複核心，沒裝則退回純 Python 掃描
+try:
+    import numba
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# SciPy 也是選用依賴：沒有 numba 時用 cKDTree 一次撈出所有容差內的配對
+try:
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+def _compile_keywords(keywords):
+    """把欄位別名清單編成單一 alternation pattern，一次掃描取代逐詞比對。"""
+    return re.compile('|'.join(re.escape(kw.lower()) for kw in keywords))
+
+
+# 欄位識別關鍵詞（預先編譯，新增別名時只需改這裡）
+_RT_PATTERN = _compile_keywords(['rt', 'retention'])
+_MZ_PATTERN = _compile_keywords(['m/z', 'mz', 'mass'])
+_PEAK_AREA_PATTERN = _compile_keywords(['peak area'])
+_INTENSITY_PATTERN = _compile_keywords(['area', 'intensity', 'abundance', 'height'])
+_ID_PATTERN = _compile_keywords(['id'])
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _dedup_sweep_range(rt, mz, occ, tot, rt_tolerance, mz_tolerance,
+                           start, end, keep_mask):
+        """Forward-window dedup scan over [start, end); see
+        MSDataProcessor._dedup_sweep."""
+        for i in range(start, end):
+            if not keep_mask[i]:
+                continue
+            rt_i = rt[i]
+            mz_i = mz[i]
+            occ_i = occ[i]
+            sum_i = tot[i]
+            j = i + 1
+            while j < end and (rt[j] - rt_i) <= rt_tolerance:
+                if keep_mask[j]:
+                    mz_j = mz[j]
+                    reference_mz = mz_j if mz_j > mz_i else mz_i
+                    # 乘法取代除法：與 |dmz|/ref <= tol 等價（ref > 0 由載入過濾保證）
+                    if abs(mz_j - mz_i) <= mz_tolerance * reference_mz:
+                        if (occ[j] > occ_i) or (occ[j] == occ_i and tot[j] > sum_i):
+                            # 後面的點嚴格勝出：i 出局，它先前淘汰的點不復活
+                            keep_mask[i] = False
+                            break
+                        else:
+                            keep_mask[j] = False
+                j += 1
+
+    @njit(cache=True, fastmath=True)
+    def _dedup_sweep_numba(rt, mz, occ, tot, rt_tolerance, mz_tolerance):
+        """Serial dedup sweep over the whole array."""
+        n = rt.size
+        keep_mask = np.ones(n, dtype=np.bool_)
+        _dedup_sweep_range(
+            rt, mz, occ, tot, rt_tolerance, mz_tolerance, 0, n, keep_mask
+        )
+        return keep_mask
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _dedup_sweep_parallel(rt, mz, occ, tot, rt_tolerance, mz_tolerance, starts):
+        """Parallel dedup sweep over chunks delimited by `starts`.
+
+        chunk 以 RT 間隙 > rt_tolerance 處切開，彼此不可能互為重複，
+        各 chunk 可獨立掃描、寫入不相交的索引區段，不需合併階段。
+        """
+        n = rt.size
+        keep_mask = np.ones(n, dtype=np.bool_)
+        for c in numba.prange(starts.size - 1):
+            _dedup_sweep_range(
+                rt, mz, occ, tot, rt_tolerance, mz_tolerance,
+                starts[c], starts[c + 1], keep_mask,
+            )
+        return keep_mask
+
+    _NUMBA_WARMED = False
+
+    def _warm_dedup_kernel():
+        """預先用 4 筆假資料觸發 JIT 編譯，避免第一次 process 時卡住 GUI。"""
+        global _NUMBA_WARMED, HAS_NUMBA
+        if _NUMBA_WARMED:
+            return
+        try:
+            dummy = np.array([1.0, 1.1, 5.0, 9.0], dtype=np.float32)
+            _dedup_sweep_numba(
+                dummy, dummy + 100.0, np.ones(4, dtype=np.int64), dummy, 1.0, 2e-5
+            )
+            _dedup_sweep_parallel(
+                dummy, dummy + 100.0, np.ones(4, dtype=np.int64), dummy, 1.0, 2e-5,
+                np.array([0, 2, 4], dtype=np.int64),
+            )
+        except Exception:
+            # cache=True 的磁碟快取（__pycache__ 下的 .nbc/.nbi）過期或
+            # 搬移後可能載入失敗直接拋例外；此時視同沒裝 numba，改走
+            # KD-tree / 純 Python 路徑（結果相同，只是較慢），不讓
+            # 建構子掛掉
+            HAS_NUMBA = False
+            return
+        _NUMBA_WARMED = True
+
+
+class MSDataProcessor:
+    """Mass Spectrometry Data Processor"""
+
+    # 沒有 numba 時，資料量達此門檻改用 scipy KD-tree 去重複（同為精確路徑）
+    _KDTREE_MIN_ROWS = 5000
+
+    # Excel 輸出超過此列數時，intensity 直接寫格式化字串（略過逐格格式）
+    _PREFORMAT_MIN_ROWS = 50_000
+
+    # 資料量達此門檻且 RT 有可切分間隙時，numba 路徑改用平行掃描
+    _PARALLEL_MIN_ROWS = 100_000
+
+    # CSV/TSV 檔案大於此位元組數時改用分塊讀取，邊讀邊過濾以控制記憶體
+    _CHUNKED_READ_MIN_BYTES = 256 * 1024 * 1024
+    _CSV_CHUNK_ROWS = 200_000
+
+    # 來源檔達此大小才寫 Parquet 側錄快取（小檔重新解析比讀快取還便宜）
+    _PARQUET_CACHE_MIN_BYTES = 8 * 1024 * 1024
+
+
+    def __init__(self, mz_tolerance_ppm=20, rt_tolerance=1):
+        """
+        Initialize processor
+        
+        Parameters:
+        -----------
+        mz_tolerance_ppm : float
+            m/z tolerance (ppm)
+        rt_tolerance : float
+            RT tolerance
+        """
+        self.set_tolerances(mz_tolerance_ppm, rt_tolerance)
+        if HAS_NUMBA:
+            _warm_dedup_kernel()
+
+    def set_tolerances(self, mz_tolerance_ppm, rt_tolerance):
+        """Update tolerances（GUI 重用已載入資料重跑時呼叫）"""
+        self.mz_tolerance = mz_tolerance_ppm / 1_000_000
+        self.rt_tolerance = rt_tolerance
+        
+    def load_data(self, file_path):
+        """
+        Load data and automatically identify columns (supports Excel, CSV, TSV)
+        
+        Parameters:
+        -----------
+        file_path : str
+            File path
+            
+        Returns:
+        --------
+        pd.DataFrame
+            DataFrame with all columns
+        """
+        file_path = str(file_path)
+        self.source_excel_path = None
+        self.source_sheet_name = None
+
+        # Read file based on extension (dispatch table, see _READERS)
+        reader = self._READERS.get(Path(file_path).suffix.lower())
+        if reader is None:
+            raise ValueError(f"Unsupported file format. Supported: .xlsx, .xls, .csv, .tsv, .txt")
+        df = self._read_with_parquet_cache(file_path, reader)
+
+        # 自動識別欄位（只要包含關鍵詞即可，大小寫不敏感）
+        norm_cols = self._normalized_columns(df.columns)
+        combined_mz_rt_col = self._find_combined_mz_rt_column(norm_cols)
+        rt_col = self._find_column(norm_cols, _RT_PATTERN)
+        mz_col = self._find_column(norm_cols, _MZ_PATTERN)
+        intensity_cols = self._find_columns(norm_cols, _PEAK_AREA_PATTERN)
+        if not intensity_cols:
+            intensity_cols = self._find_columns(norm_cols, _INTENSITY_PATTERN)
+        id_col = self._find_column(norm_cols, _ID_PATTERN)
+
+        # If header does not indicate combined m/z/RT, infer from first column values.
+        if not combined_mz_rt_col:
+            combined_mz_rt_col = self._infer_combined_mz_rt_column(df)
+
+        # If no intensity columns matched by keywords, default to all columns after m/z/RT.
+        _internal_cols = {"__is_red_font"}
+        if not intensity_cols and combined_mz_rt_col:
+            intensity_cols = [c for c in self._columns_after(df.columns, combined_mz_rt_col) if c not in _internal_cols]
+        elif not intensity_cols and rt_col and mz_col:
+            exclude = {rt_col, mz_col} | _internal_cols
+            if id_col:
+                exclude.add(id_col)
+            intensity_cols = [col for col in df.columns if col not in exclude]
+        
+        # 判斷資料來源（僅供顯示）
+        has_mzmine = any('mzmine' in col_lower for _, col_lower in norm_cols)
+        self.data_source = "MZmine" if has_mzmine else "FeatureHunter"
+        
+        self.temp_mz_rt_cols = []
+
+        self.temp_mz_rt_cols = []
+
+        if combined_mz_rt_col:
+            mz_col = "mz"
+            rt_col = "rt"
+            if mz_col in df.columns:
+                mz_col = "__mz"
+            if rt_col in df.columns:
+                rt_col = "__rt"
+            mz_vals, rt_vals = self._split_combined_mz_rt(df[combined_mz_rt_col])
+            np.round(mz_vals, 4, out=mz_vals)
+            np.round(rt_vals, 4, out=rt_vals)
+            df[mz_col] = mz_vals
+            df[rt_col] = rt_vals
+            # Mark derived columns for removal before output.
+            self.temp_mz_rt_cols = [mz_col, rt_col]
+        elif rt_col and mz_col:
+            # Keep original values for output; parse numerics only when needed.
+            pass
+        
+        if rt_col and mz_col and intensity_cols:
+            self.rt_col = rt_col
+            self.mz_col = mz_col
+            self.intensity_cols = intensity_cols
+            self.intensity_col = intensity_cols[0]
+            columns_list = list(df.columns)
+            self.intensity_col_positions = [
+                i for i, col in enumerate(columns_list) if col in self.intensity_cols
+            ]
+            
+        else:
+            available_cols = "\nAvailable columns: " + ", ".join(df.columns.tolist())
+            raise ValueError(f"Cannot identify required columns.\nPlease check your file headers.{available_cols}")
+
+        self.all_columns = list(df.columns)
+
+        # 一次建好所有過濾條件再索引，避免多次中間 DataFrame 配置
+        # Remove invalid data (m/z > 0 and any intensity > 0)
+        # np.round(out=) 就地進位，省掉 Series.round 的整欄複本
+        mz_num = self._numeric_series(df[self.mz_col]).to_numpy(dtype=float, copy=True)
+        np.round(mz_num, 4, out=mz_num)
+        rt_num = self._numeric_series(df[self.rt_col]).to_numpy(dtype=float, copy=True)
+        np.round(rt_num, 4, out=rt_num)
+        intensity_num = self._numeric_intensity_df(df)
+        intensity_positive = (intensity_num > 0).any(axis=1)
+        valid_mask = (
+            (mz_num > 0)
+            & intensity_positive.to_numpy()
+            & ~np.isnan(rt_num)
+            & ~np.isnan(mz_num)
+        )
+
+        # 有 ID 欄位且來源為 MZmine 時，再排除無效 ID 的列
+        if id_col and has_mzmine:
+            valid_mask &= (
+                df[id_col].notna()
+                & (df[id_col].astype(str).str.strip().str.upper() != 'NA')
+            ).to_numpy()
+
+        df = df[valid_mask]
+
+        # 中間階段不重建索引；最終輸出的索引由 process 的 concat 統一處理
+        return df
+    
+    def _read_delimited(self, file_path, sep):
+        """
+        Read CSV/TSV, preferring the multithreaded pyarrow parser.
+
+        pyarrow 解析大型 CSV 快數倍；未安裝 pyarrow 或 pandas 版本太舊時
+        退回內建 C parser，行為不變。先讀 50 列預覽驗證欄位可識別，
+        避免整個大檔解析完才發現格式錯誤。
+        （輸出需保留所有欄位，因此不做 usecols 欄位裁剪。）
+        """
+        preview = pd.read_csv(file_path, sep=sep, nrows=50, keep_default_na=False)
+        norm_cols = self._normalized_columns(preview.columns)
+        identifiable = (
+            self._find_combined_mz_rt_column(norm_cols)
+            or (
+                self._find_column(norm_cols, _RT_PATTERN)
+                and self._find_column(norm_cols, _MZ_PATTERN)
+            )
+            or self._infer_combined_mz_rt_column(preview)
+        )
+        if not identifiable:
+            available_cols = "\nAvailable columns: " + ", ".join(
+                str(col) for col in preview.columns
+            )
+            raise ValueError(
+                f"Cannot identify required columns.\nPlease check your file headers.{available_cols}"
+            )
+
+        # 超大檔案改走分塊讀取，避免一次載入整個檔案
+        if os.path.getsize(file_path) >= self._CHUNKED_READ_MIN_BYTES:
+            return self._read_delimited_chunked(file_path, sep, preview)
+
+        try:
+            return pd.read_csv(
+                file_path, sep=sep, keep_default_na=False, engine='pyarrow'
+            )
+        except (ImportError, ValueError, TypeError):
+            return pd.read_csv(file_path, sep=sep, keep_default_na=False)
+
+    def _read_delimited_chunked(self, file_path, sep, preview):
+        """
+        Stream a large CSV/TSV in chunks, filtering invalid rows per chunk.
+
+        每塊先套用 load_data 之後也會套的基本條件（m/z > 0、RT 非空），
+        讓尖峰記憶體取決於有效資料量而非檔案大小。合併 m/z/RT 欄位的
+        格式無法在這裡便宜判斷，該情況只分塊不過濾。
+        """
+        norm_cols = self._normalized_columns(preview.columns)
+        combined = (
+            self._find_combined_mz_rt_column(norm_cols)
+            or self._infer_combined_mz_rt_column(preview)
+        )
+        rt_col = self._find_column(norm_cols, _RT_PATTERN)
+        mz_col = self._find_column(norm_cols, _MZ_PATTERN)
+
+        pieces = []
+        reader = pd.read_csv(
+            file_path, sep=sep, keep_default_na=False, chunksize=self._CSV_CHUNK_ROWS
+        )
+        for chunk in reader:
+            if not combined and rt_col and mz_col:
+                mz_num = self._numeric_series(chunk[mz_col])
+                rt_num = self._numeric_series(chunk[rt_col])
+                chunk = chunk[(mz_num > 0) & rt_num.notna()]
+            pieces.append(chunk)
+        return pd.concat(pieces, ignore_index=True)
+
+    def _normalized_columns(self, columns):
+        """欄位名正規化只做一次，後續所有關鍵詞比對共用這份快取。"""
+        return [(col, str(col).lower().strip()) for col in columns]
+
+    def _read_csv_source(self, file_path):
+        return self._read_delimited(file_path, sep=',')
+
+    def _read_tsv_source(self, file_path):
+        return self._read_delimited(file_path, sep='\t')
+
+    def _read_excel_source(self, file_path):
+        """Read an Excel source: scan red-font rows, then load values."""
+        # 記錄原始檔案路徑，供輸出時複製工作表使用
+        self.source_excel_path = file_path
+        # read_only 模式串流解析，不會把整個工作表物件化到記憶體；
+        # 只迭代 column A，字型資訊在 read_only cell 上照樣可讀
+        wb_temp = load_workbook(file_path, read_only=True)
+        self.source_sheet_name = wb_temp.sheetnames[0]
+        ws_temp = wb_temp[self.source_sheet_name]
+
+        # 偵測 column A 中帶有紅色字型 (rgb 類型) 的資料列
+        red_font_pandas_indices = set()
+        for row in ws_temp.iter_rows(min_row=2, min_col=1, max_col=1):
+            cell = row[0]
+            font = cell.font
+            if font and font.color and font.color.type == 'rgb':
+                rgb_str = str(font.color.rgb)
+                if 'FF0000' in rgb_str.upper():
+                    # pandas DataFrame index = Excel row - 2
+                    red_font_pandas_indices.add(cell.row - 2)
+
+        wb_temp.close()
+        df = self._read_excel_values(file_path)
+        # 直接在 DataFrame 中標記紅色列，讓標記跟著資料一起過濾
+        df["__is_red_font"] = df.index.isin(red_font_pandas_indices)
+        return df
+
+    def _read_excel_values(self, file_path):
+        """
+        Read Excel cell values, preferring the calamine engine.
+
+        python-calamine（Rust 實作）讀值比 openpyxl 快一個數量級；未安裝
+        或 pandas 版本不支援時退回預設引擎。紅字掃描仍走 openpyxl，因為
+        需要字型資訊。
+        """
+        try:
+            return pd.read_excel(file_path, keep_default_na=False, engine='calamine')
+        except (ImportError, ValueError):
+            return pd.read_excel(file_path, keep_default_na=False)
+
+    @staticmethod
+    def _parquet_cache_paths(file_path):
+        """側錄快取檔路徑：來源檔旁的 <原檔名>.cache.parquet 與 .cache.meta。"""
+        src = Path(file_path)
+        cache_path = src.with_name(src.name + '.cache.parquet')
+        meta_path = src.with_name(src.name + '.cache.meta')
+        return cache_path, meta_path
+
+    def _read_with_parquet_cache(self, file_path, reader):
+        """
+        Read through an on-disk Parquet sidecar cache when available.
+
+        調參重跑時來源檔解析（尤其 .xlsx）佔掉大半時間。第一次成功解析
+        後在來源旁寫一份 .cache.parquet（columnar 且壓縮，重讀快一個數量
+        級），之後來源 mtime/大小未變就直接讀快取。快取讀寫任何失敗都
+        靜默退回正常解析，不影響主流程。
+        """
+        try:
+            stat = os.stat(file_path)
+            signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+            cacheable = stat.st_size >= self._PARQUET_CACHE_MIN_BYTES
+        except OSError:
+            signature = None
+            cacheable = False
+
+        cache_path, meta_path = self._parquet_cache_paths(file_path)
+        if signature is not None and cache_path.exists() and meta_path.exists():
+            try:
+                meta_lines = meta_path.read_text(encoding='utf-8').splitlines()
+                if meta_lines and meta_lines[0] == signature:
+                    df = pd.read_parquet(cache_path, engine='pyarrow')
+                    if Path(file_path).suffix.lower() in ('.xlsx', '.xls'):
+                        # 快取命中時也要能走輸出的工作表複製路徑
+                        self.source_excel_path = file_path
+                        self.source_sheet_name = (
+                            meta_lines[1] if len(meta_lines) > 1 and meta_lines[1] else None
+                        )
+                    return df
+            except Exception:
+                pass
+
+        df = reader(self, file_path)
+
+        if cacheable:
+            try:
+                df.to_parquet(cache_path, engine='pyarrow', compression='zstd', index=False)
+                meta_path.write_text(
+                    f"{signature}\n{self.source_sheet_name or ''}\n", encoding='utf-8'
+                )
+            except Exception:
+                # 寫不進去（唯讀目錄、缺 pyarrow、欄位型別混雜）就放棄快取
+                for leftover in (cache_path, meta_path):
+                    try:
+                        leftover.unlink()
+                    except OSError:
+                        pass
+
+        return df
+
+    # 副檔名 -> 讀取函式（load_data 據此分派）
+    _READERS = {
+        '.csv': _read_csv_source,
+        '.tsv': _read_tsv_source,
+        '.txt': _read_tsv_source,
+        '.xlsx': _read_excel_source,
+        '.xls': _read_excel_source,
+    }
+
+    def _find_column(self, normalized_columns, pattern):
+        """
+        Find matching column name - 只要欄位名包含任一關鍵詞即可（大小寫不敏感）
+
+        Parameters:
+        -----------
+        normalized_columns : list of (column, lowered) pairs
+            Output of _normalized_columns
+        pattern : re.Pattern
+            Compiled alternation of keywords (see _compile_keywords)
+
+        Returns:
+        --------
+        str or None
+            Found column name
+        """
+        for col, col_lower in normalized_columns:
+            if pattern.search(col_lower):
+                return col
+        return None
+
+    def _find_columns(self, normalized_columns, pattern):
+        """Find all matching column names by compiled keyword pattern."""
+        return [col for col, col_lower in normalized_columns if pattern.search(col_lower)]
+
+    def _find_combined_mz_rt_column(self, normalized_columns):
+        """Find a combined m/z/RT column, e.g., 'mz/RT'."""
+        for col, col_lower in normalized_columns:
+            col_lower = col_lower.replace(" ", "")
+            if "mz" in col_lower and "rt" in col_lower and "/" in col_lower:
+                return col
+        return None
+
+    def _infer_combined_mz_rt_column(self, df):
+        """Infer combined m/z/RT column from first column values."""
+        if df is None or df.empty:
+            return None
+        first_col = df.columns[0]
+        series = df[first_col].astype(str)
+        sample = series[series.notna()].head(50)
+        if sample.empty:
+            return None
+        parts = sample.str.split("/", n=1, expand=True)
+        if parts.shape[1] < 2:
+            return None
+        left = pd.to_numeric(parts[0].str.strip(), errors="coerce")
+        right = pd.to_numeric(parts[1].str.strip(), errors="coerce")
+        valid_ratio = ((left.notna()) & (right.notna())).mean()
+        if valid_ratio >= 0.6:
+            return first_col
+        return None
+
+    def _split_combined_mz_rt(self, series):
+        """
+        Split a combined 'mz/RT' string column into two float arrays.
+
+        優先用 pyarrow 的 columnar 字串運算（split/trim/cast 全程不建
+        Python 物件 DataFrame）；pyarrow 未安裝或有無法轉換的值時退回
+        pandas 路徑，維持 errors='coerce' 的語意。
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+
+            arr = pa.array(series.astype(str), type=pa.string())
+            parts = pc.split_pattern(arr, "/", max_splits=1)
+            mz_vals = pc.cast(
+                pc.utf8_trim_whitespace(pc.list_element(parts, 0)), pa.float64()
+            ).to_numpy(zero_copy_only=False)
+            rt_vals = pc.cast(
+                pc.utf8_trim_whitespace(pc.list_element(parts, 1)), pa.float64()
+            ).to_numpy(zero_copy_only=False)
+            # zero-copy 會借用 Arrow buffer（唯讀）；呼叫端要就地運算，確保可寫
+            if not mz_vals.flags.writeable:
+                mz_vals = mz_vals.copy()
+            if not rt_vals.flags.writeable:
+                rt_vals = rt_vals.copy()
+            return mz_vals, rt_vals
+        except ImportError:
+            pass
+        except Exception:
+            # 有值切不出兩段或轉不成數字時，交給 pandas 的 coerce 語意處理
+            pass
+        parts = series.astype(str).str.split("/", n=1, expand=True)
+        if parts.shape[1] < 2:
+            raise ValueError("Combined m/z/RT column detected but values are not in 'mz/RT' format.")
+        mz_vals = pd.to_numeric(parts[0].str.strip(), errors="coerce").to_numpy(dtype=float, copy=True)
+        rt_vals = pd.to_numeric(parts[1].str.strip(), errors="coerce").to_numpy(dtype=float, copy=True)
+        return mz_vals, rt_vals
+
+    def _columns_after(self, columns, col):
+        """Return columns after the specified column in original order."""
+        columns_list = list(columns)
+        if col not in columns_list:
+            return []
+        idx = columns_list.index(col)
+        return columns_list[idx + 1:]
+
+    def _drop_temp_columns(self, df):
+        """Remove derived columns from combined m/z/RT."""
+        temp_cols = getattr(self, "temp_mz_rt_cols", [])
+        if not temp_cols:
+            return df
+        cols_to_drop = [col for col in temp_cols if col in df.columns]
+        if not cols_to_drop:
+            return df
+        return df.drop(columns=cols_to_drop)
+
+    def _normalize_output_columns(self, df):
+        """Restore blank headers where pandas created 'Unnamed: x'."""
+        rename_map = {}
+        for col in df.columns:
+            if isinstance(col, str) and col.startswith("Unnamed: "):
+                rename_map[col] = ""
+        if not rename_map:
+            return df
+        return df.rename(columns=rename_map)
+
+    def _numeric_series(self, series):
+        return pd.to_numeric(series, errors="coerce")
+
+    def _numeric_intensity_df(self, df):
+        return df[self.intensity_cols].apply(pd.to_numeric, errors="coerce")
+
+    def _compute_occurrence_and_sum(self, df):
+        intensities = self._numeric_intensity_df(df).to_numpy(dtype=float)
+        # count_nonzero 單趟計數，省掉 sum 路徑的 int64 中間矩陣
+        occurrence = np.count_nonzero(intensities > 0, axis=1)
+        total_intensity = np.nansum(intensities, axis=1)
+        return occurrence, total_intensity
+
+    def _signal_arrays(self, df):
+        """一次把去重複需要的欄位抽成 NumPy 陣列，之後全程不再碰 DataFrame。"""
+        rt_values = self._numeric_series(df[self.rt_col]).to_numpy(dtype=float)
+        mz_values = self._numeric_series(df[self.mz_col]).to_numpy(dtype=float)
+        occurrence, total_intensity = self._compute_occurrence_and_sum(df)
+        return rt_values, mz_values, occurrence, total_intensity
+    
+    def find_unique_signals(self, df):
+        """
+        Find unique signals (remove duplicates), keep all other columns
+        使用 RT 排序後的前向窗口掃描，避免 O(n²) 逐列比較
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Original data
+
+        Returns:
+        --------
+        pd.DataFrame
+            De-duplicated data
+        """
+        if len(df) == 0:
+            return df
+
+        rt_values, mz_values, occurrence, total_intensity = self._signal_arrays(df)
+
+        # float32 足以涵蓋 ppm 等級的容差（>6 位有效數字），頻寬減半
+        order = np.argsort(rt_values)
+        rt_sorted = rt_values[order].astype(np.float32)
+        mz_sorted = mz_values[order].astype(np.float32)
+        occ_sorted = occurrence[order].astype(np.int64)
+        sum_sorted = total_intensity[order].astype(np.float32)
+
+        if HAS_NUMBA:
+            rt_tol = float(self.rt_tolerance)
+            mz_tol = float(self.mz_tolerance)
+            chunk_starts = None
+            if len(df) >= self._PARALLEL_MIN_ROWS:
+                # RT 間隙大於容差處可安全切分，各段平行掃描
+                gap_positions = np.flatnonzero(np.diff(rt_sorted) > rt_tol) + 1
+                if gap_positions.size > 0:
+                    chunk_starts = np.concatenate(
+                        ([0], gap_positions, [len(df)])
+                    ).astype(np.int64)
+            if chunk_starts is not None:
+                keep_sorted = _dedup_sweep_parallel(
+                    rt_sorted, mz_sorted, occ_sorted, sum_sorted,
+                    rt_tol, mz_tol, chunk_starts,
+                )
+            else:
+                keep_sorted = _dedup_sweep_numba(
+                    rt_sorted, mz_sorted, occ_sorted, sum_sorted, rt_tol, mz_tol
+                )
+        elif (
+            HAS_SCIPY
+            and len(df) >= self._KDTREE_MIN_ROWS
+            and self.rt_tolerance > 0
+            and self.mz_tolerance > 0
+        ):
+            keep_sorted = self._dedup_kdtree(
+                rt_sorted, mz_sorted, occ_sorted, sum_sorted
+            )
+        else:
+            # 沒有 numba/scipy 也維持相同結果：純 Python 前向窗口掃描，
+            # 慢但不會像分箱近似那樣多併掉容差邊緣的訊號
+            keep_sorted = self._dedup_sweep(rt_sorted, mz_sorted, occ_sorted, sum_sorted)
+
+        # 把排序域的 keep mask 散佈回原始列序，用連續掃描的布林索引取列，
+        # 避免對寬表做隨機 gather；也讓後續穩定排序的同值列維持原檔順序
+        orig_keep = np.zeros(len(df), dtype=bool)
+        orig_keep[order[keep_sorted]] = True
+        result = df[orig_keep]
+        # 去重複時已把每列總強度算好，留給 finalize 當排序鍵重用
+        self._dedup_totals_frame = result
+        self._dedup_totals = total_intensity[orig_keep]
+        return result
+
+    def _dedup_sweep(self, rt_sorted, mz_sorted, occ_sorted, sum_sorted):
+        """
+        Forward-window dedup scan over RT-sorted arrays.
+
+        逐點往後掃 RT 容差窗：窗內容差相符時，除非後面那點嚴格勝出
+        （occurrence 較高，或同 occurrence 且總強度較高），否則淘汰後面
+        那點；被嚴格勝出時當前點出局、立刻換下一點（它先前淘汰的點不
+        復活）。平手留前面的點。RT 排序讓窗口掃描近線性，所有去重複
+        路徑都照這條規則走，結果才與安裝了哪些加速套件無關。
+
+        Parameters:
+        -----------
+        rt_sorted, mz_sorted, occ_sorted, sum_sorted : np.ndarray
+            Signal data sorted by RT ascending
+
+        Returns:
+        --------
+        np.ndarray
+            Boolean mask of rows to keep (in sorted order)
+        """
+        n = rt_sorted.size
+        keep_mask = np.ones(n, dtype=bool)
+
+        for i in range(n):
+            if not keep_mask[i]:
+                continue
+            rt_i = rt_sorted[i]
+            mz_i = mz_sorted[i]
+            occ_i = occ_sorted[i]
+            sum_i = sum_sorted[i]
+            j = i + 1
+            while j < n and (rt_sorted[j] - rt_i) <= self.rt_tolerance:
+                if keep_mask[j]:
+                    mz_j = mz_sorted[j]
+                    reference_mz = mz_j if mz_j > mz_i else mz_i
+                    # 乘法取代除法，與 KD-tree 路徑的寫法一致
+                    if abs(mz_j - mz_i) <= self.mz_tolerance * reference_mz:
+                        if (occ_sorted[j] > occ_i) or (
+                            occ_sorted[j] == occ_i and sum_sorted[j] > sum_i
+                        ):
+                            keep_mask[i] = False
+                            break
+                        else:
+                            keep_mask[j] = False
+                j += 1
+
+        return keep_mask
+
+    def _dedup_kdtree(self, rt_sorted, mz_sorted, occ_sorted, sum_sorted):
+        """
+        Exact dedup via a cKDTree range query (no-numba fallback).
+
+        把點放到 (RT/rt_tol, log-m/z/log(1+mz_tol)) 座標後，容差內配對
+        就是 Chebyshev 半徑 1 的鄰居，一次 query_pairs C 呼叫全部撈出；
+        半徑略放大再精確複驗，確保與掃描相同的容差判定。之後在撈出的
+        配對上重放 _dedup_sweep 的前向淘汰規則，survivor 與掃描路徑
+        逐列一致，結果不受安裝了哪些加速套件影響。
+
+        Parameters:
+        -----------
+        rt_sorted, mz_sorted, occ_sorted, sum_sorted : np.ndarray
+            Signal data sorted by RT ascending
+
+        Returns:
+        --------
+        np.ndarray
+            Boolean mask of rows to keep (in sorted order)
+        """
+        n = rt_sorted.size
+        # 座標一定要用 float64 算：float32 的 log 量化誤差可達半徑的
+        # 幾個百分點，會讓容差邊緣的配對漏抓
+        points = np.column_stack([
+            rt_sorted.astype(np.float64) / self.rt_tolerance,
+            np.log(np.where(mz_sorted > 0, mz_sorted, 1.0).astype(np.float64))
+            / math.log1p(self.mz_tolerance),
+        ])
+        # 容差以最大 m/z 為基準：|dmz| <= tol*max 等價於 log 距離
+        # <= log(1/(1-tol))，比 log(1+tol) 多出 O(tol²)，半徑放大
+        # 幾個 tol 涵蓋，邊緣配對才不會漏抓（多抓的由下面精確複驗剔除）
+        pairs = cKDTree(points).query_pairs(
+            r=1.0 + 4.0 * self.mz_tolerance + 1e-7, p=np.inf, output_type="ndarray"
+        )
+
+        if pairs.size:
+            # 精確複驗容差（樹的半徑只是粗篩）
+            a = pairs[:, 0]
+            b = pairs[:, 1]
+            reference_mz = np.maximum(mz_sorted[a], mz_sorted[b])
+            valid = (
+                (np.abs(rt_sorted[a] - rt_sorted[b]) <= self.rt_tolerance)
+                & (reference_mz > 0)
+                & (np.abs(mz_sorted[a] - mz_sorted[b]) <= self.mz_tolerance * reference_mz)
+            )
+            pairs = pairs[valid]
+
+        keep_mask = np.ones(n, dtype=bool)
+        if pairs.size == 0:
+            return keep_mask
+
+        # 前向鄰接表（CSR 形式）：query_pairs 保證 a < b，依 (a, b) 排序後
+        # 每個點的前向鄰居即按 RT 序遞增，與窗口掃描的走訪順序相同
+        a = pairs[:, 0]
+        b = pairs[:, 1]
+        adj_order = np.lexsort((b, a))
+        fwd = b[adj_order]
+        counts = np.bincount(a, minlength=n)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # 重放 _dedup_sweep 的前向淘汰規則（只差在候選對已由樹篩出）
+        for i in range(n):
+            if not keep_mask[i]:
+                continue
+            occ_i = occ_sorted[i]
+            sum_i = sum_sorted[i]
+            for idx in range(offsets[i], offsets[i + 1]):
+                j = fwd[idx]
+                if not keep_mask[j]:
+                    continue
+                if (occ_sorted[j] > occ_i) or (
+                    occ_sorted[j] == occ_i and sum_sorted[j] > sum_i
+                ):
+                    keep_mask[i] = False
+                    break
+                keep_mask[j] = False
+        return keep_mask
+
+    def process(self, file_path, top_n=None):
+        """
+        Complete processing workflow
+        
+        Parameters:
+        -----------
+        file_path : str
+            Input file path
+        top_n : int, optional
+            Output top N signals, None means output all
+            
+        Returns:
+        --------
+        tuple
+            (processed DataFrame, statistics dictionary)
+        """
+        # Load data
+        df_original = self.load_data(file_path)
+
+        # Remove duplicates
+        df_red, df_unique = self.deduplicate(df_original)
+
+        return self.finalize(df_red, df_unique, len(df_original), top_n)
+
+    def deduplicate(self, df_original):
+        """
+        Split off red-font rows and de-duplicate the rest
+
+        獨立成一階段，讓 GUI 能以 (檔案, 容差) 為鍵快取結果
+
+        Parameters:
+        -----------
+        df_original : pd.DataFrame
+            Output of load_data
+
+        Returns:
+        --------
+        tuple
+            (red-font rows DataFrame, de-duplicated DataFrame)
+        """
+        # 分離紅色標記列（不參與去重複，直接保留）
+        has_red_col = "__is_red_font" in df_original.columns
+        if has_red_col and df_original["__is_red_font"].any():
+            red_mask = df_original["__is_red_font"]
+            df_red = df_original[red_mask].copy()
+            df_normal = df_original[~red_mask].drop(columns=["__is_red_font"])
+        else:
+            df_red = pd.DataFrame()
+            df_normal = df_original.drop(columns=["__is_red_font"], errors="ignore")
+
+        # Remove duplicates（僅對非紅色列進行）
+        df_unique = self.find_unique_signals(df_normal)
+        return df_red, df_unique
+
+    def finalize(self, df_red, df_unique, original_count, top_n=None):
+        """
+        Sort, take top N, merge red rows back, and build statistics
+
+        Parameters:
+        -----------
+        df_red, df_unique : pd.DataFrame
+            Output of deduplicate
+        original_count : int
+            Row count after load_data
+        top_n : int, optional
+            Output top N signals, None means output all
+
+        Returns:
+        --------
+        tuple
+            (processed DataFrame, statistics dictionary)
+        """
+        unique_count = len(df_unique)
+
+        # Sort by intensity (sum across samples if multiple)
+        # find_unique_signals 算過的總強度可直接重用（單一樣本欄時
+        # nansum 與該欄 fillna(0) 等值）；拿到的不是同一份 frame 才重算
+        if df_unique is getattr(self, "_dedup_totals_frame", None):
+            sort_key = self._dedup_totals
+        else:
+            intensity_num = self._numeric_intensity_df(df_unique).fillna(0)
+            if len(self.intensity_cols) == 1:
+                sort_key = intensity_num[self.intensity_cols[0]].to_numpy(dtype=float)
+            else:
+                sort_key = intensity_num.sum(axis=1).to_numpy(dtype=float)
+
+        # Take top N（僅對非紅色列計數）
+        # top_n 遠小於資料量時用 argpartition 做 O(n) 選取，只排序前段
+        if top_n and 0 < top_n < len(df_unique) // 4:
+            top_idx = np.argpartition(-sort_key, top_n)[:top_n]
+            top_idx = top_idx[np.argsort(-sort_key[top_idx], kind="stable")]
+            df_result = df_unique.iloc[top_idx]
+        else:
+            order = np.argsort(-sort_key, kind="stable")
+            if top_n and top_n > 0:
+                order = order[:top_n]
+            df_result = df_unique.iloc[order]
+
+        # 合併：紅色標記列（置頂） + 去重複結果
+        if not df_red.empty:
+            df_red = df_red.copy()
+            df_red["__is_red_font"] = True
+        df_result = df_result.copy()
+        df_result["__is_red_font"] = False
+        df_result = pd.concat([df_red, df_result], ignore_index=True)
+
+        # Remove derived m/z/RT columns before output
+        df_result = self._drop_temp_columns(df_result)
+        df_result = self._normalize_output_columns(df_result)
+        
+        # Statistics
+        red_count = len(df_red)
+        stats = {
+            'original_count': original_count,
+            'unique_count': unique_count,
+            'output_count': len(df_result),
+            'red_preserved_count': red_count,
+            'data_source': self.data_source,
+            'sample_count': len(self.intensity_cols)
+        }
+        
+        return df_result, stats
+    
+    def save_results(self, df, output_path):
+        """
+        Save results (supports Excel, CSV, TSV)
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Data to save
+        output_path : str
+            Output file path
+        """
+        output_path = str(output_path)
+
+        # 取出紅色標記資訊，然後移除暫存欄位
+        red_font_flags = []
+        if "__is_red_font" in df.columns:
+            red_font_flags = df["__is_red_font"].tolist()
+            df = df.drop(columns=["__is_red_font"])
+
+        if output_path.endswith('.csv'):
+            df.to_csv(output_path, index=False)
+        elif output_path.endswith('.tsv') or output_path.endswith('.txt'):
+            df.to_csv(output_path, sep='\t', index=False)
+        elif output_path.endswith('.parquet'):
+            # 欄式二進位格式：大量輸出時寫入快、檔案小（需要 pyarrow）
+            df.to_parquet(output_path, index=False)
+        elif output_path.endswith(('.xlsx', '.xls')):
+            source_path = getattr(self, "source_excel_path", None)
+            sheet_name = getattr(self, "source_sheet_name", None)
+
+            if source_path and sheet_name:
+                # 完整複製原始 Excel 檔（保留所有工作表、字型、格式）
+                wb = load_workbook(source_path)
+                ws = wb[sheet_name]
+
+                # 清除該工作表原有資料
+                ws.delete_rows(1, ws.max_row)
+
+                # 寫入處理後的資料（標題 + 內容），intensity 格式一併處理
+                # 輸出列數極大時改寫預先格式化的字串，省去逐格格式紀錄
+                intensity_excel_cols = {
+                    col_idx + 1 for col_idx in self._intensity_column_indices(df)
+                }
+                preformat = len(df) > self._PREFORMAT_MIN_ROWS
+                for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
+                    for c_idx, value in enumerate(row, 1):
+                        if r_idx > 1 and c_idx in intensity_excel_cols:
+                            if preformat:
+                                try:
+                                    value = f"{float(value):.2E}"
+                                except (TypeError, ValueError):
+                                    pass
+                                ws.cell(row=r_idx, column=c_idx, value=value)
+                            else:
+                                cell = ws.cell(row=r_idx, column=c_idx, value=value)
+                                cell.number_format = '0.00E+00'
+                        else:
+                            ws.cell(row=r_idx, column=c_idx, value=value)
+
+                # 對紅色標記列的 column A 套用紅色字型
+                if red_font_flags:
+                    red_font_style = Font(color="FF0000")
+                    for i, is_red in enumerate(red_font_flags):
+                        if is_red:
+                            # DataFrame row i → Excel row i+2 (row 1 = header)
+                            cell = ws.cell(row=i + 2, column=1)
+                            cell.font = red_font_style
+
+                wb.save(output_path)
+                wb.close()
+            else:
+                # 非 Excel 來源或缺少資訊，退回一般寫出
+                try:
+                    self._write_excel_streaming(df, output_path)
+                except (ImportError, ValueError):
+                    self._write_excel_openpyxl(df, output_path)
+        else:
+            raise ValueError(f"Unsupported output format. Supported: .xlsx, .xls, .csv, .tsv, .txt, .parquet")
+
+    def _intensity_column_indices(self, df):
+        """輸出時強度欄位的 0-based 位置（優先用載入時記錄的原始位置）。"""
+        col_positions = getattr(self, "intensity_col_positions", [])
+        if col_positions:
+            return list(col_positions)
+        columns_list = list(df.columns)
+        return [
+            columns_list.index(col) for col in self.intensity_cols if col in columns_list
+        ]
+
+    def _write_excel_streaming(self, df, output_path):
+        """
+        Write xlsx via xlsxwriter in constant-memory streaming mode.
+
+        逐列串流寫出、記憶體固定，且科學記號格式用一次 set_column 套用
+        整欄，取代逐格設定。constant_memory 模式要求嚴格逐列寫入，所以
+        不走 DataFrame.to_excel，自行迭代列。xlsxwriter 未安裝時丟
+        ImportError 由呼叫端退回 openpyxl。
+        """
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(
+            output_path, {'constant_memory': True, 'nan_inf_to_errors': True}
+        )
+        try:
+            worksheet = workbook.add_worksheet('Sheet1')
+            sci_format = workbook.add_format({'num_format': '0.00E+00'})
+            # 格式須在寫入資料列前套用，串流模式下事後補不回去
+            for col_idx in self._intensity_column_indices(df):
+                worksheet.set_column(col_idx, col_idx, None, sci_format)
+            worksheet.write_row(0, 0, [str(col) for col in df.columns])
+            for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+                worksheet.write_row(row_idx, 0, row)
+        finally:
+            workbook.close()
+
+    def _write_excel_openpyxl(self, df, output_path):
+        """
+        openpyxl 後備寫出（未安裝 xlsxwriter 時）。
+
+        write_only 模式逐列 append、不建整張儲存格字典，記憶體與寫入
+        時間都遠低於一般模式 + 事後逐格補格式的寫法。
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Sheet1')
+        ws.append([str(col) for col in df.columns])
+        intensity_idx = set(self._intensity_column_indices(df))
+        for row in df.itertuples(index=False, name=None):
+            cells = []
+            for i, value in enumerate(row):
+                cell = WriteOnlyCell(ws, value=value)
+                if i in intensity_idx:
+                    cell.number_format = '0.00E+00'
+                cells.append(cell)
+            ws.append(cells)
+        wb.save(output_path)
+
+
+class MSProcessorGUI:
+    """Graphical User Interface with flat design"""
+    
+    # Color scheme - high contrast flat design
+    COLORS = {
+        'bg': '#F5F5F5',           # Light gray background
+        'card': '#FFFFFF',          # White cards
+        'primary': '#2196F3',       # Blue primary
+        'primary_dark': '#1976D2',  # Darker blue
+        'success': '#4CAF50',       # Green
+        'success_dark': '#388E3C',  # Darker green
+        'text': '#212121',          # Dark text
+        'text_secondary': '#757575', # Gray text
+        'border': '#E0E0E0',        # Light border
+        'shadow': '#00000010'       # Subtle shadow
+    }
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("MS Data Deduplication Tool")
+        self.root.geometry("700x550")
+        
+        # Detect platform and apply appropriate styling
+        self.is_macos = sys.platform == 'darwin'
+        
+        if self.is_macos:
+            # macOS specific configuration
+            try:
+                # Use ttk.Style for better macOS compatibility
+                self.style = ttk.Style()
+                self.style.theme_use('aqua')
+            except:
+                pass
+        
+        self.root.configure(bg=self.COLORS['bg'])
+        
+        # Make window non-resizable for consistent layout
+        self.root.resizable(False, False)
+        
+        self.processor = None
+        self.input_file = None
+        self.param_entries = []  # Initialize before create_widgets
+        # 處理工作丟到背景執行緒，避免大檔案凍結 Tk 主迴圈
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        # 同一檔案重跑時重用載入/去重複結果（只留最近一個檔案的快取）
+        self._raw_cache = {}    # (path, mtime) -> (processor, df_original)
+        self._dedup_cache = {}  # (path, mtime, mz_tol, rt_tol) -> (df_red, df_unique)
+        # 狀態訊息進 queue，由 Tk 迴圈定期批次倒出（worker 不直接碰 widget）
+        self._log_queue = queue.Queue()
+        self.root.after(100, self._drain_log)
+        
+        # Get the directory where the executable is located
+        if getattr(sys, 'frozen', False):
+            # Running as compiled executable
+            if self.is_macos:
+                # For macOS .app bundle, get the directory containing the .app
+                # sys.executable points to: YourApp.app/Contents/MacOS/YourApp
+                # We want the directory containing YourApp.app
+                executable_path = Path(sys.executable)
+                # Go up: MacOS -> Contents -> YourApp.app -> parent directory
+                app_bundle = executable_path.parent.parent.parent
+                self.base_dir = app_bundle.parent
+            else:
+                # For Windows executable
+                self.base_dir = Path(sys.executable).parent
+        else:
+            # Running as script
+            self.base_dir = Path(__file__).parent
+        
+        # Create output directory with error handling
+        try:
+            self.output_dir = self.base_dir / "output_Replicates_eliminating_tool"
+            self.output_dir.mkdir(exist_ok=True)
+            # Test write permission
+            test_file = self.output_dir / ".write_test"
+            test_file.touch()
+            test_file.unlink()
+        except (PermissionError, OSError) as e:
+            # If we can't write to the app directory, use user's Documents folder
+            if self.is_macos:
+                home = Path.home()
+                self.output_dir = home / "Documents" / "output_Replicates_eliminating_tool"
+            else:
+                # Windows fallback to Documents
+                home = Path.home()
+                self.output_dir = home / "Documents" / "output_Replicates_eliminating_tool"
+
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as mkdir_error:
+                # Last resort: use temporary directory
+                import tempfile
+                self.output_dir = Path(tempfile.gettempdir()) / "output_Replicates_eliminating_tool"
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.create_widgets()
+
+        # Tools 選單：清除記憶體與磁碟上的側錄快取
+        menubar = tk.Menu(self.root)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Clear cache", command=self.clear_cache)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.root.config(menu=menubar)
+
+    def clear_cache(self):
+        """清掉記憶體快取與目前選取檔案旁的 Parquet 側錄快取。"""
+        self._raw_cache = {}
+        self._dedup_cache = {}
+        if self.input_file:
+            for path in MSDataProcessor._parquet_cache_paths(self.input_file):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        self.update_status("Cache cleared")
+
+    def create_card(self, parent, **kwargs):
+        """Create a card-style frame"""
+        frame = tk.Frame(
+            parent,
+            bg=self.COLORS['card'],
+            highlightbackground=self.COLORS['border'],
+            highlightthickness=1,
+            **kwargs
+        )
+        return frame
+    
+    def _create_button(self, parent, text, command, color_key='primary', **kwargs):
+        """Create a styled button with platform-specific handling"""
+        if self.is_macos:
+            # Use ttk.Button for macOS with custom styling
+            button = ttk.Button(
+                parent,
+                text=text,
+                command=command,
+                **kwargs
+            )
+            # Apply hover effect using bind
+            def on_enter(e):
+                # macOS ttk buttons handle their own hover states
+                pass
+            def on_leave(e):
+                pass
+            button.bind("<Enter>", on_enter)
+            button.bind("<Leave>", on_leave)
+        else:
+            # Use tk.Button with full styling for Windows/Linux
+            button = tk.Button(
+                parent,
+                text=text,
+                command=command,
+                bg=self.COLORS[color_key],
+                fg="white",
+                font=("Segoe UI", kwargs.get('font_size', 10), "bold"),
+                relief="flat",
+                cursor="hand2",
+                **{k: v for k, v in kwargs.items() if k not in ['font_size']}
+            )
+            dark_color = color_key + '_dark'
+            if dark_color in self.COLORS:
+                button.bind("<Enter>", lambda e: button.config(bg=self.COLORS[dark_color]))
+                button.bind("<Leave>", lambda e: button.config(bg=self.COLORS[color_key]))
+        
+        return button
+    
+    def create_widgets(self):
+        # Main container with padding
+        main_container = tk.Frame(self.root, bg=self.COLORS['bg'])
+        main_container.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Title section
+        title_frame = tk.Frame(main_container, bg=self.COLORS['bg'])
+        title_frame.pack(fill="x", pady=(0, 20))
+        
+        title_font = ("SF Pro Display", 24, "bold") if self.is_macos else ("Segoe UI", 24, "bold")
+        subtitle_font = ("SF Pro Text", 10) if self.is_macos else ("Segoe UI", 10)
+        
+        title_label = tk.Label(
+            title_frame,
+            text="MS Data Deduplication Tool",
+            font=title_font,
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text']
+        )
+        title_label.pack()
+        
+        subtitle_label = tk.Label(
+            title_frame,
+            text="Remove duplicate signals and export top results",
+            font=subtitle_font,
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text_secondary']
+        )
+        subtitle_label.pack()
+        
+        # File selection card
+        file_card = self.create_card(main_container)
+        file_card.pack(fill="x", pady=(0, 15))
+        
+        file_inner = tk.Frame(file_card, bg=self.COLORS['card'])
+        file_inner.pack(fill="x", padx=20, pady=15)
+        
+        tk.Label(
+            file_inner,
+            text="1. Select Input File",
+            font=("Segoe UI", 11, "bold"),
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text']
+        ).pack(anchor="w", pady=(0, 10))
+        
+        file_row = tk.Frame(file_inner, bg=self.COLORS['card'])
+        file_row.pack(fill="x")
+        
+        label_font = ("SF Pro Text", 9) if self.is_macos else ("Segoe UI", 9)
+        
+        self.file_label = tk.Label(
+            file_row,
+            text="No file selected",
+            font=label_font,
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text_secondary'],
+            anchor="w"
+        )
+        self.file_label.pack(side="left", fill="x", expand=True)
+        
+        # Create browse button
+        if self.is_macos:
+            select_btn = ttk.Button(
+                file_row,
+                text="Browse Files",
+                command=self.select_file
+            )
+        else:
+            select_btn = tk.Button(
+                file_row,
+                text="Browse Files",
+                command=self.select_file,
+                bg=self.COLORS['primary'],
+                fg="white",
+                font=("Segoe UI", 10, "bold"),
+                relief="flat",
+                cursor="hand2",
+                padx=20,
+                pady=8
+            )
+            select_btn.bind("<Enter>", lambda e: select_btn.config(bg=self.COLORS['primary_dark']))
+            select_btn.bind("<Leave>", lambda e: select_btn.config(bg=self.COLORS['primary']))
+        
+        select_btn.pack(side="right")
+        
+        # Parameters card
+        param_card = self.create_card(main_container)
+        param_card.pack(fill="x", pady=(0, 15))
+        
+        param_inner = tk.Frame(param_card, bg=self.COLORS['card'])
+        param_inner.pack(fill="x", padx=20, pady=15)
+        
+        tk.Label(
+            param_inner,
+            text="2. Configure Parameters",
+            font=("Segoe UI", 11, "bold"),
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text']
+        ).pack(anchor="w", pady=(0, 15))
+        
+        # Parameter grid
+        param_grid = tk.Frame(param_inner, bg=self.COLORS['card'])
+        param_grid.pack(fill="x")
+        
+        # m/z tolerance
+        self.mz_tolerance_var = self._create_param_row(param_grid, "m/z Tolerance (ppm):", "20", 
+                               "Acceptable mass difference")
+        
+        # RT tolerance
+        self.rt_tolerance_var = self._create_param_row(param_grid, "RT Tolerance:", "1", 
+                               "Acceptable retention time difference")
+        
+        # Top N
+        self.top_n_var = self._create_param_row(param_grid, "Output Top N Signals:", "10", 
+                               "Enter 0 for all signals")
+        
+        # Process button
+        if self.is_macos:
+            process_btn = ttk.Button(
+                main_container,
+                text="Start Processing",
+                command=self.process_data
+            )
+        else:
+            process_btn = tk.Button(
+                main_container,
+                text="Start Processing",
+                command=self.process_data,
+                bg=self.COLORS['success'],
+                fg="white",
+                font=("Segoe UI", 12, "bold"),
+                relief="flat",
+                cursor="hand2",
+                padx=30,
+                pady=15
+            )
+            process_btn.bind("<Enter>", lambda e: process_btn.config(bg=self.COLORS['success_dark']))
+            process_btn.bind("<Leave>", lambda e: process_btn.config(bg=self.COLORS['success']))
+        
+        process_btn.pack(pady=(0, 15))
+        
+        # Status card
+        status_card = self.create_card(main_container)
+        status_card.pack(fill="both", expand=True)
+        
+        status_inner = tk.Frame(status_card, bg=self.COLORS['card'])
+        status_inner.pack(fill="both", expand=True, padx=20, pady=15)
+        
+        tk.Label(
+            status_inner,
+            text="Processing Status",
+            font=("Segoe UI", 11, "bold"),
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text']
+        ).pack(anchor="w", pady=(0, 10))
+        
+        text_font = ("Menlo", 9) if self.is_macos else ("Consolas", 9)
+        
+        self.status_text = tk.Text(
+            status_inner,
+            height=8,
+            font=text_font,
+            bg="#FAFAFA",
+            fg=self.COLORS['text'],
+            relief="flat",
+            borderwidth=0,
+            state="disabled"
+        )
+        self.status_text.pack(fill="both", expand=True)
+    
+    def _create_param_row(self, parent, label_text, default_value, hint_text):
+        """Create a parameter input row"""
+        row_frame = tk.Frame(parent, bg=self.COLORS['card'])
+        row_frame.pack(fill="x", pady=8)
+        
+        param_font = ("SF Pro Text", 10, "bold") if self.is_macos else ("Segoe UI", 10, "bold")
+        hint_font = ("SF Pro Text", 9) if self.is_macos else ("Segoe UI", 9)
+        entry_font = ("SF Pro Text", 10) if self.is_macos else ("Segoe UI", 10)
+        
+        # Left side: Label
+        tk.Label(
+            row_frame,
+            text=label_text,
+            font=param_font,
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text'],
+            anchor="w",
+            width=20
+        ).pack(side="left")
+        
+        # Middle: Entry
+        entry_var = tk.StringVar(value=default_value)
+        entry = tk.Entry(
+            row_frame,
+            textvariable=entry_var,
+            font=entry_font,
+            bg="white",
+            fg=self.COLORS['text'],
+            relief="solid",
+            borderwidth=1,
+            width=12
+        )
+        entry.pack(side="left", padx=(0, 15))
+        
+        # Right side: Hint text
+        tk.Label(
+            row_frame,
+            text=hint_text,
+            font=hint_font,
+            bg=self.COLORS['card'],
+            fg=self.COLORS['text_secondary'],
+            anchor="w"
+        ).pack(side="left", fill="x", expand=True)
+        
+        return entry_var  # Return the StringVar directly
+    
+    def select_file(self):
+        """Select input file"""
+        file_path = filedialog.askopenfilename(
+            title="Select Data File",
+            filetypes=[
+                ("All Supported Formats", "*.xlsx *.xls *.csv *.tsv *.txt"),
+                ("Excel files", "*.xlsx *.xls"),
+                ("CSV files", "*.csv"),
+                ("TSV files", "*.tsv *.txt"),
+                ("All files", "*.*")
+            ]
+        )
+        
+        if file_path:
+            self.input_file = file_path
+            self.file_label.config(
+                text=Path(file_path).name,
+                fg=self.COLORS['text']
+            )
+    
+    def update_status(self, message):
+        """Update status display (thread-safe: message is queued for the Tk loop)"""
+        self._log_queue.put(message)
+
+    def _drain_log(self):
+        """批次倒出待顯示的狀態訊息，每 100ms 一次"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self.status_text.config(state="normal")
+            self.status_text.insert("end", "\n".join(lines) + "\n")
+            self.status_text.see("end")
+            self.status_text.config(state="disabled")
+        self.root.after(100, self._drain_log)
+
+    def process_data(self):
+        """Validate inputs and hand processing to the worker thread"""
+        if not self.input_file:
+            messagebox.showerror("Error", "Please select an input file first!")
+            return
+
+        # Read parameters
+        try:
+            mz_tol = float(self.mz_tolerance_var.get())
+            rt_tol = float(self.rt_tolerance_var.get())
+            top_n = int(self.top_n_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Parameters must be numeric!")
+            return
+        if top_n == 0:
+            top_n = None
+
+        # Clear status
+        self.status_text.config(state="normal")
+        self.status_text.delete(1.0, "end")
+        self.status_text.config(state="disabled")
+
+        future = self._executor.submit(self._run_processing, mz_tol, rt_tol, top_n)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self._on_processing_done, f)
+        )
+
+    def _run_processing(self, mz_tol, rt_tol, top_n):
+        """Full processing workflow; runs on the worker thread"""
+        self.update_status("Starting processing...")
+        self.update_status(f"Output directory: {self.output_dir}")
+
+        raw_key = (self.input_file, os.path.getmtime(self.input_file))
+        cached_raw = self._raw_cache.get(raw_key)
+        if cached_raw is not None:
+            processor, df_original = cached_raw
+            processor.set_tolerances(mz_tol, rt_tol)
+            self.update_status("Loading data... (reusing cached file)")
+        else:
+            processor = MSDataProcessor(mz_tolerance_ppm=mz_tol, rt_tolerance=rt_tol)
+            self.update_status("Loading data...")
+            df_original = processor.load_data(self.input_file)
+            self._raw_cache = {raw_key: (processor, df_original)}
+            self._dedup_cache = {}
+
+        dedup_key = raw_key + (mz_tol, rt_tol)
+        cached_dedup = self._dedup_cache.get(dedup_key)
+        if cached_dedup is not None:
+            df_red, df_unique = cached_dedup
+            self.update_status("Removing duplicates... (reusing cached result)")
+        else:
+            self.update_status("Removing duplicates...")
+            df_red, df_unique = processor.deduplicate(df_original)
+            self._dedup_cache[dedup_key] = (df_red, df_unique)
+
+        df_result, stats = processor.finalize(df_red, df_unique, len(df_original), top_n)
+
+        # Display identified columns
+        self.update_status(f"\nData Source: {stats['data_source']}")
+        self.update_status(f"Identified Columns:")
+        self.update_status(f"  RT: {processor.rt_col}")
+        self.update_status(f"  m/z: {processor.mz_col}")
+        self.update_status(f"  Intensity columns ({len(processor.intensity_cols)}): {', '.join(processor.intensity_cols)}")
+        self.update_status(f"Samples detected: {stats['sample_count']}")
+        other_cols = len(processor.all_columns) - len(processor.intensity_cols) - 2
+        self.update_status(f"Other columns preserved: {max(other_cols, 0)}")
+
+        # Generate output filename with timestamp
+        input_path = Path(self.input_file)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_suffix = input_path.suffix
+        # Excel 不適合十萬列等級的輸出：逐格模型又慢又肥，改存 CSV
+        if output_suffix.lower() in ('.xlsx', '.xls') and len(df_result) > 50_000:
+            output_suffix = '.csv'
+            self.update_status(
+                f"\nLarge output ({len(df_result)} rows): saving as CSV instead of Excel"
+            )
+        output_filename = f"processed_{input_path.stem}_{timestamp}{output_suffix}"
+        output_path = self.output_dir / output_filename
+
+        # Ensure output directory exists and is writable
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as mkdir_error:
+            self.update_status(f"\nWarning: Could not create output directory: {mkdir_error}")
+            # Fallback to Desktop
+            desktop = Path.home() / "Desktop" / "MS_Data_Output"
+            desktop.mkdir(parents=True, exist_ok=True)
+            output_path = desktop / output_filename
+            self.update_status(f"Using alternative location: {desktop}")
+
+        # Save results
+        self.update_status("\nSaving results...")
+        processor.save_results(df_result, str(output_path))
+
+        # Display statistics
+        self.update_status("\n" + "="*50)
+        self.update_status("Processing Complete!")
+        self.update_status(f"Original data: {stats['original_count']} signals")
+        if stats.get('red_preserved_count', 0) > 0:
+            self.update_status(f"Red-font preserved (no dedup): {stats['red_preserved_count']} signals")
+        self.update_status(f"After deduplication: {stats['unique_count']} signals")
+        self.update_status(f"Output count: {stats['output_count']} signals")
+        self.update_status(f"\nResults saved to:\n{output_path}")
+
+        return output_path
+
+    def _on_processing_done(self, future):
+        """Back on the Tk thread: report success or failure"""
+        try:
+            output_path = future.result()
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            messagebox.showerror("Error", f"An error occurred during processing:\n{str(e)}")
+            self.update_status(f"\nError: {str(e)}")
+            self.update_status(f"\nDetails:\n{error_details}")
+            return
+
+        # Show file in Finder/Explorer
+        if self.is_macos:
+            import subprocess
+            subprocess.run(["open", "-R", str(output_path)])
+
+        messagebox.showinfo("Success", f"Processing complete!\n\nResults saved to:\n{output_path}")
+
+
+def main():
+    """Main program"""
+    root = tk.Tk()
+    app = MSProcessorGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()